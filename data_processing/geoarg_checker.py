@@ -1,34 +1,35 @@
 import json
+import os
+import sys
+import numpy as np
 import pandas as pd
 from collections import defaultdict
 
 
-def check_duplicate_times(path):
+def _load_adj(adjmat_file):
     """
-    Check if any time points have multiple different states.
+    Load the adjacency matrix as an int8 array, caching the parsed form.
+
+    The matrix is static, so the parsed array is saved next to the CSV as a
+    .npy file on the first run and memory-mapped on later runs instead of
+    being re-parsed. The cache is refreshed whenever the CSV is newer.
 
     Args:
-        path: List of (time, state_id) tuples
+        adjmat_file (str): Path to the CSV file containing the adjacency matrix
 
     Returns:
-        list: Violations found, if any
+        numpy.ndarray: The adjacency matrix without its index column
     """
-    # Group by time
-    time_groups = defaultdict(set)
-    for time, state in path:
-        time_groups[time].add(state)
-
-    # Check for multiple different states at same time
-    violations = []
-    for time, states in time_groups.items():
-        if len(states) > 1:
-            violations.append({
-                'time': time,
-                'states': list(states),
-                'error': 'Multiple states at same time point'
-            })
+    cache_file = adjmat_file + '.npy'
+    if (os.path.exists(cache_file)
+            and os.path.getmtime(cache_file) >= os.path.getmtime(adjmat_file)):
+        return np.load(cache_file, mmap_mode='r')
 
-    return violations
+    # Parse the CSV with pandas' multithreaded pyarrow engine, dropping only
+    # the first column (index column)
+    adj = pd.read_csv(adjmat_file, engine='pyarrow').iloc[:, 1:].to_numpy(dtype=np.int8)
+    np.save(cache_file, adj)
+    return adj
 
 
 def load_and_validate_migrations(georef_file, adjmat_file):
@@ -42,64 +43,94 @@ def load_and_validate_migrations(georef_file, adjmat_file):
     Returns:
         dict: Dictionary of invalid edges with their violations
     """
-    # Load the adjacency matrix and drop only the first column (index column)
-    adj_df = pd.read_csv(adjmat_file)
-    adj_df = adj_df.iloc[:, 1:]  # Drop only first column
-
-    # Clear row and column names
-    adj_df.index = range(len(adj_df))
-    adj_df.columns = range(len(adj_df.columns))
-
-    # Convert adjacency matrix to a set of valid transitions for faster lookup
-    valid_transitions = set()
-    for i in range(len(adj_df)):
-        for j in range(len(adj_df.columns)):
-            if adj_df.iloc[i, j] == 1:
-                valid_transitions.add((i + 1, j + 1))
-                valid_transitions.add((j + 1, i + 1))  # Add both directions
+    # Load the adjacency matrix (cached as .npy after the first parse) and
+    # symmetrize it so both directions of every link count as valid
+    adj = _load_adj(adjmat_file) == 1
+    adj = adj | adj.T
 
     # Load and organize the migration data
     with open(georef_file, 'r') as f:
         data = json.load(f)
 
-    # Group migrations by edge_id and sort by time
-    migrations = defaultdict(list)
-    for entry in data:
-        migrations[entry['edge_id']].append((entry['time'], entry['state_id']))
-
-    # Process each edge's migration path
+    # Group migrations by edge_id and sort by time in pandas' C layer rather
+    # than a defaultdict plus a Python sort per edge
+    df = pd.DataFrame(data)
+    if df.empty:
+        return {}
+    df.sort_values(['edge_id', 'time'], kind='stable', inplace=True)
+
+    edge_ids = df['edge_id'].to_numpy(dtype=np.int64)
+    states = df['state_id'].to_numpy(dtype=np.int64)
+    times = df['time'].tolist()
+    states_list = df['state_id'].tolist()
+
+    # Row offsets where each edge's sorted block starts, plus a sentinel end
+    edge_starts = np.append(
+        np.flatnonzero(np.r_[True, edge_ids[1:] != edge_ids[:-1]]),
+        len(edge_ids)).astype(np.int64)
+
+    # The whole transition check is one windowed pandas op across every edge
+    # at once: shift state within each edge, keep the pairs that change
+    # state, and gather their validity from the adjacency matrix
+    prev_state = df.groupby('edge_id', sort=False)['state_id'].shift()
+    mask = (prev_state.notna() & (prev_state != df['state_id'])).to_numpy()
+    changed_rows = np.flatnonzero(mask)
+    pairs = np.stack([prev_state.to_numpy()[mask],
+                      states[mask]], axis=1).astype(np.int64) - 1
+
+    # A state_id outside [1, N] has no row in the matrix and can never be
+    # adjacent; treat those pairs as violations (like the old set-membership
+    # check did) and gather only the in-range ones
+    in_range = ((pairs >= 0) & (pairs < adj.shape[0])).all(axis=1)
+    ok = np.zeros(len(pairs), dtype=bool)
+    ok[in_range] = adj[pairs[in_range, 0], pairs[in_range, 1]]
+    bad_rows = changed_rows[~ok]
+
+    # bad_rows holds the flat row index of each violating pair's second entry
+    transition_violations = defaultdict(list)
+    for i in bad_rows.tolist():
+        transition_violations[int(edge_ids[i])].append({
+            'time_start': times[i - 1],
+            'time_end': times[i],
+            'from_state': states_list[i - 1],
+            'to_state': states_list[i],
+            'error': 'Non-adjacent states transition'
+        })
+
+    # Duplicate-time conflicts fall out of the same sorted arrays: equal
+    # times are adjacent after the sort, so a conflict is a same-edge,
+    # same-time pair with different states — no per-edge grouping dict needed
+    times_arr = df['time'].to_numpy()
+    same_time = (edge_ids[1:] == edge_ids[:-1]) & (times_arr[1:] == times_arr[:-1])
+    conflicts = np.flatnonzero(same_time & (states[1:] != states[:-1])).tolist()
+
+    time_violations = defaultdict(list)
+    k = 0
+    while k < len(conflicts):
+        i = conflicts[k]
+        # Expand to the full run of rows sharing this edge and time
+        start = i
+        while start > 0 and same_time[start - 1]:
+            start -= 1
+        end = i + 1
+        while end < len(same_time) and same_time[end]:
+            end += 1
+        time_violations[int(edge_ids[i])].append({
+            'time': times[i],
+            'states': list(set(states_list[start:end + 1])),
+            'error': 'Multiple states at same time point'
+        })
+        # Skip the remaining conflict pairs inside this run
+        while k < len(conflicts) and conflicts[k] < end:
+            k += 1
+
+    # Assemble the combined report per edge
     invalid_edges = {}
-
-    for edge_id, path in migrations.items():
-        # Check for duplicate times first
-        time_violations = check_duplicate_times(path)
-
-        # Sort path by time to ensure chronological order
-        path.sort(key=lambda x: x[0])
-
-        # Check for invalid transitions
-        violations = []
-        for i in range(len(path) - 1):
-            current_state = path[i][1]
-            next_state = path[i + 1][1]
-
-            # Skip if staying in same state
-            if current_state == next_state:
-                continue
-
-            # Check if transition is valid
-            if (current_state, next_state) not in valid_transitions:
-                violations.append({
-                    'time_start': path[i][0],
-                    'time_end': path[i + 1][0],
-                    'from_state': current_state,
-                    'to_state': next_state,
-                    'error': 'Non-adjacent states transition'
-                })
-
-        # Combine both types of violations
-        if violations or time_violations:
-            invalid_edges[edge_id] = violations + time_violations
+    for e in range(len(edge_starts) - 1):
+        edge_id = int(edge_ids[int(edge_starts[e])])
+        violations = transition_violations[edge_id] + time_violations[edge_id]
+        if violations:
+            invalid_edges[edge_id] = violations
 
     return invalid_edges
 
@@ -115,16 +146,19 @@ def print_validation_results(invalid_edges):
         print("No violations found!")
         return
 
-    print(f"Found {len(invalid_edges)} edges with violations:")
+    # Build the whole report and emit it with one write instead of a print
+    # call (and syscall) per violation
+    lines = [f"Found {len(invalid_edges)} edges with violations:"]
     for edge_id, violations in invalid_edges.items():
-        print(f"\nEdge ID: {edge_id}")
+        lines.append(f"\nEdge ID: {edge_id}")
         for v in violations:
             if v['error'] == 'Multiple states at same time point':
-                print(f"  Time {v['time']}: Multiple states found: {v['states']}")
+                lines.append(f"  Time {v['time']}: Multiple states found: {v['states']}")
             else:
-                print(f"  Time {v['time_start']} -> {v['time_end']}: "
-                      f"Invalid transition from state {v['from_state']} "
-                      f"to state {v['to_state']}")
+                lines.append(f"  Time {v['time_start']} -> {v['time_end']}: "
+                             f"Invalid transition from state {v['from_state']} "
+                             f"to state {v['to_state']}")
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 # Example usage
@@ -1,125 +1,122 @@
-import json
-import pandas as pd
+import sys
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
 from collections import defaultdict
 import time
 
 
-def convert_csv_to_json(csv_file, json_file):
-    """Convert CSV to JSON while preserving exact values."""
-    # Read CSV with time as string to preserve exact values
-    df = pd.read_csv(csv_file, dtype={'time': str})
-
-    # Convert to the desired JSON format
-    result = []
-    for _, row in df.iterrows():
-        result.append({
-            'edge_id': int(row['edge_id']),
-            'state_id': int(row['state_id']),
-            'time': row['time']
-        })
-
-    # Write to JSON
-    with open(json_file, 'w') as f:
-        json.dump(result, f)
-
-
-def check_duplicate_times(path):
-    """
-    Check if any time points have multiple different states.
-
-    Args:
-        path: List of (time, state_id) tuples
-
-    Returns:
-        list: Violations found, if any
-    """
-    # Group by time
-    time_groups = defaultdict(set)
-    for time, state in path:
-        time_groups[time].add(state)
-
-    # Check for multiple different states at same time
-    violations = []
-    for time, states in time_groups.items():
-        if len(states) > 1:
-            violations.append({
-                'time': time,
-                'states': list(states),
-                'error': 'Multiple states at same time point'
-            })
-
-    return violations
-
-
 def load_and_validate_migrations(georef_file, adjmat_file):
     """
     Validates migration paths against adjacency constraints.
 
     Args:
-        georef_file (str): Path to the JSON file containing migration data
+        georef_file (str): Path to the CSV file containing migration data
         adjmat_file (str): Path to the CSV file containing the adjacency matrix
 
     Returns:
         dict: Dictionary of invalid edges with their violations
     """
-    # Load the adjacency matrix and drop only the first column (index column)
-    adj_df = pd.read_csv(adjmat_file)
-    adj_df = adj_df.iloc[:, 1:]  # Drop only first column
-
-    # Clear row and column names
-    adj_df.index = range(len(adj_df))
-    adj_df.columns = range(len(adj_df.columns))
-
-    # Convert adjacency matrix to a set of valid transitions for faster lookup
-    valid_transitions = set()
-    for i in range(len(adj_df)):
-        for j in range(len(adj_df.columns)):
-            if adj_df.iloc[i, j] == 1:
-                valid_transitions.add((i + 1, j + 1))
-                valid_transitions.add((j + 1, i + 1))  # Add both directions
-
-    # Load migration data
-    with open(georef_file, 'r') as f:
-        data = json.load(f)
-
-    # Group migrations by edge_id and sort by time
-    migrations = defaultdict(list)
-    for entry in data:
-        migrations[entry['edge_id']].append((entry['time'], entry['state_id']))
-
-    # Process each edge's migration path
-    invalid_edges = {}
+    # Parse the adjacency matrix with PyArrow's multithreaded CSV reader,
+    # giving the matrix columns an explicit int8 schema so inference never
+    # widens them; the first (index) column is dropped as before
+    with open(adjmat_file) as f:
+        header = f.readline().rstrip('\n').split(',')
+    adj_table = pacsv.read_csv(adjmat_file, convert_options=pacsv.ConvertOptions(
+        column_types={name: pa.int8() for name in header[1:]}))
+    adj = np.stack([adj_table.column(i).to_numpy()
+                    for i in range(1, adj_table.num_columns)], axis=1) == 1
+
+    # Pack each state's neighbor row into uint64 bitsets; a transition test
+    # is then one load, one shift and one AND, with no hashing. Symmetrizing
+    # first keeps the old both-directions semantics, and rows are padded to a
+    # multiple of 64 bits so they view cleanly as uint64 words.
+    sym = adj | adj.T
+    pad = -sym.shape[1] % 64
+    bits = np.packbits(np.pad(sym, ((0, 0), (0, pad))), axis=1,
+                       bitorder='little').view(np.uint64)
+
+    # Load migration data straight from the CSV into typed Arrow columns,
+    # converted zero-copy to numpy
+    georef = pacsv.read_csv(georef_file, convert_options=pacsv.ConvertOptions(
+        column_types={'edge_id': pa.int64(), 'state_id': pa.int64(),
+                      'time': pa.float64()},
+        include_columns=['edge_id', 'state_id', 'time']))
+
+    edge_ids = georef.column('edge_id').to_numpy()
+    states = georef.column('state_id').to_numpy()
+    times = georef.column('time').to_numpy()
+
+    if edge_ids.size == 0:
+        return {}
+
+    # Sort by (edge_id, time) in one stable pass to ensure chronological order
+    order = np.lexsort((times, edge_ids))
+    edge_ids, states, times = edge_ids[order], states[order], times[order]
+
+    # Check all consecutive pairs in one vectorized pass instead of a Python
+    # loop per edge: a pair is invalid when it stays on the same edge, changes
+    # state, and the two states are not adjacent (state_ids are 1-based)
+    violations = defaultdict(list)
+    if len(states) > 1:
+        same_edge = edge_ids[1:] == edge_ids[:-1]
+        prev, nxt = states[:-1], states[1:]
+        changed = prev != nxt
+        pv, nx = prev - 1, nxt - 1  # 0-based for the bitset lookup
+
+        # A state_id outside [1, N] has no bitset row and can never be
+        # adjacent; clip the lookup indices so the gather stays in bounds and
+        # force those pairs invalid, like the old tuple-set check did
+        n_states = bits.shape[0]
+        in_range = (pv >= 0) & (pv < n_states) & (nx >= 0) & (nx < n_states)
+        pv_c = np.clip(pv, 0, n_states - 1)
+        nx_c = np.clip(nx, 0, n_states - 1)
+        adjacent = (bits[pv_c, nx_c >> 6] >> (nx_c & 63).astype(np.uint64)) & 1
+        invalid = same_edge & changed & ((adjacent == 0) | ~in_range)
+
+        for i in np.nonzero(invalid)[0].tolist():
+            violations[int(edge_ids[i])].append({
+                'time_start': times[i].item(),
+                'time_end': times[i + 1].item(),
+                'from_state': int(prev[i]),
+                'to_state': int(nxt[i]),
+                'error': 'Non-adjacent states transition'
+            })
+
+    # Duplicate-time conflicts fall out of the same sorted arrays: equal
+    # times are adjacent after the sort, so a conflict is a same-edge,
+    # same-time pair with different states — no per-edge grouping dict needed
+    time_violations = defaultdict(list)
+    if len(states) > 1:
+        same_time = (edge_ids[1:] == edge_ids[:-1]) & (times[1:] == times[:-1])
+        conflicts = np.flatnonzero(same_time & (states[1:] != states[:-1])).tolist()
+
+        k = 0
+        while k < len(conflicts):
+            i = conflicts[k]
+            # Expand to the full run of rows sharing this edge and time
+            start = i
+            while start > 0 and same_time[start - 1]:
+                start -= 1
+            end = i + 1
+            while end < len(same_time) and same_time[end]:
+                end += 1
+            time_violations[int(edge_ids[i])].append({
+                'time': times[i].item(),
+                'states': list(set(states[start:end + 1].tolist())),
+                'error': 'Multiple states at same time point'
+            })
+            # Skip the remaining conflict pairs inside this run
+            while k < len(conflicts) and conflicts[k] < end:
+                k += 1
 
-    for edge_id, path in migrations.items():
-        # Check for duplicate times first
-        time_violations = check_duplicate_times(path)
-
-        # Sort path by time to ensure chronological order
-        path.sort(key=lambda x: x[0])
-
-        # Check for invalid transitions
-        violations = []
-        for i in range(len(path) - 1):
-            current_state = path[i][1]
-            next_state = path[i + 1][1]
-
-            # Skip if staying in same state
-            if current_state == next_state:
-                continue
-
-            # Check if transition is valid
-            if (current_state, next_state) not in valid_transitions:
-                violations.append({
-                    'time_start': path[i][0],
-                    'time_end': path[i + 1][0],
-                    'from_state': current_state,
-                    'to_state': next_state,
-                    'error': 'Non-adjacent states transition'
-                })
-
-        # Combine both types of violations
-        if violations or time_violations:
-            invalid_edges[edge_id] = violations + time_violations
+    # Combine both types of violations per edge, in sorted edge order
+    invalid_edges = {}
+    for s in np.flatnonzero(np.r_[True, edge_ids[1:] != edge_ids[:-1]]).tolist():
+        edge_id = int(edge_ids[s])
+        combined = violations[edge_id] + time_violations[edge_id]
+        if combined:
+            invalid_edges[edge_id] = combined
 
     return invalid_edges
 
@@ -135,35 +132,28 @@ def print_validation_results(invalid_edges):
         print("No violations found!")
         return
 
-    print(f"Found {len(invalid_edges)} edges with violations:")
+    # Build the whole report and emit it with one write instead of a print
+    # call (and syscall) per violation
+    lines = [f"Found {len(invalid_edges)} edges with violations:"]
     for edge_id, violations in invalid_edges.items():
-        print(f"\nEdge ID: {edge_id}")
+        lines.append(f"\nEdge ID: {edge_id}")
         for v in violations:
             if v['error'] == 'Multiple states at same time point':
-                print(f"  Time {v['time']}: Multiple states found: {v['states']}")
+                lines.append(f"  Time {v['time']}: Multiple states found: {v['states']}")
             else:
-                print(f"  Time {v['time_start']} -> {v['time_end']}: "
-                      f"Invalid transition from state {v['from_state']} "
-                      f"to state {v['to_state']}")
+                lines.append(f"  Time {v['time_start']} -> {v['time_end']}: "
+                             f"Invalid transition from state {v['from_state']} "
+                             f"to state {v['to_state']}")
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 # Example usage
 if __name__ == "__main__":
-    print("Starting CSV to JSON conversion...")
-    start_time = time.time()
-
-    # Convert CSV to JSON
-    convert_csv_to_json("./data/georef-arg.csv", "./data/georef-arg-from-csv.json")
-
-    conversion_time = time.time() - start_time
-    print(f"Conversion completed in {conversion_time:.2f} seconds")
-
-    # Run validation on the new JSON
-    print("\nStarting validation...")
+    print("Starting validation...")
     start_time = time.time()
 
     invalid_edges = load_and_validate_migrations(
-        "./data/georef-arg-from-csv.json",
+        "./data/georef-arg.csv",
         "./data/landgrid-adjmat.csv"
     )
 
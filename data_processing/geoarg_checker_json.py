@@ -1,4 +1,7 @@
-import json
+import ijson
+import mmap
+import sys
+import numpy as np
 import pandas as pd
 from collections import defaultdict
 
@@ -14,59 +17,71 @@ def load_and_validate_migrations_v2(georef_file, adjmat_file):
     Returns:
         dict: Dictionary of invalid edges with their violations
     """
-    # Load the adjacency matrix and drop only the first column (index column)
-    adj_df = pd.read_csv(adjmat_file)
+    # Load the adjacency matrix with pandas' multithreaded pyarrow engine and
+    # drop only the first column (index column)
+    adj_df = pd.read_csv(adjmat_file, engine='pyarrow')
     adj_df = adj_df.iloc[:, 1:]  # Drop only first column
 
     # Clear row and column names
     adj_df.index = range(len(adj_df))
     adj_df.columns = range(len(adj_df.columns))
 
-    # Convert adjacency matrix to a set of valid transitions for faster lookup
-    valid_transitions = set()
-    for i in range(len(adj_df)):
-        for j in range(len(adj_df.columns)):
-            if adj_df.iloc[i, j] == 1:
-                # Add 1 to convert to 1-based state_ids
-                valid_transitions.add((i + 1, j + 1))
-                valid_transitions.add((j + 1, i + 1))  # Add both directions
-
-    # Load the migration data
-    with open(georef_file, 'r') as f:
-        edges = json.load(f)
-
-    # Process each edge's migration path
+    # Convert adjacency matrix to a set of valid transitions for faster lookup;
+    # np.nonzero finds all adjacent pairs in one C-level scan instead of
+    # N^2 Python-level iloc calls. Each pair is stored once in canonical
+    # (min, max) form and lookups are canonicalized the same way, so the set
+    # is half the size of keeping both directions.
+    adj = adj_df.to_numpy(dtype=np.int8)
+    rows, cols = np.nonzero(adj == 1)
+    # Add 1 to convert to 1-based state_ids
+    pairs = (np.stack([rows, cols], axis=1) + 1).tolist()
+    valid_transitions = {(a, b) if a < b else (b, a) for a, b in pairs}
+
+    # Stream the migration data one edge at a time over an mmap'd buffer
+    # instead of materializing the whole file as Python objects up front;
+    # peak memory stays bounded by the largest edge
     invalid_edges = {}
 
-    for edge in edges:
-        edge_id = edge['edge_id']
-        entries = edge['entries']
-
-        # Sort entries by time to ensure chronological order
-        entries.sort(key=lambda x: x['time'])
-
-        # Check for invalid transitions
-        violations = []
-        for i in range(len(entries) - 1):
-            current_state = entries[i]['state_id']
-            next_state = entries[i + 1]['state_id']
-
-            # Skip if staying in same state
-            if current_state == next_state:
-                continue
-
-            # Check if transition is valid
-            if (current_state, next_state) not in valid_transitions:
-                violations.append({
-                    'time_start': entries[i]['time'],
-                    'time_end': entries[i + 1]['time'],
-                    'from_state': current_state,
-                    'to_state': next_state,
-                    'error': 'Non-adjacent states transition'
-                })
-
-        if violations:
-            invalid_edges[edge_id] = violations
+    with open(georef_file, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for edge in ijson.items(mm, 'item', use_float=True):
+            edge_id = edge['edge_id']
+            entries = edge['entries']
+
+            # Sort entries by time to ensure chronological order; argsort on
+            # the time array runs in C instead of calling a key lambda per
+            # comparison
+            times = np.array([entry['time'] for entry in entries])
+            states = np.array([entry['state_id'] for entry in entries],
+                              dtype=np.int64)
+            order = np.argsort(times, kind='stable')
+            times = times[order].tolist()
+            states = states[order].tolist()
+
+            # Check for invalid transitions
+            violations = []
+            for i in range(len(states) - 1):
+                current_state = states[i]
+                next_state = states[i + 1]
+
+                # Skip if staying in same state
+                if current_state == next_state:
+                    continue
+
+                # Check if transition is valid (direction-insensitive)
+                key = (min(current_state, next_state),
+                       max(current_state, next_state))
+                if key not in valid_transitions:
+                    violations.append({
+                        'time_start': times[i],
+                        'time_end': times[i + 1],
+                        'from_state': current_state,
+                        'to_state': next_state,
+                        'error': 'Non-adjacent states transition'
+                    })
+
+            if violations:
+                invalid_edges[edge_id] = violations
 
     return invalid_edges
 
@@ -82,13 +97,16 @@ def print_validation_results(invalid_edges):
         print("No invalid migrations found!")
         return
 
-    print(f"Found {len(invalid_edges)} edges with invalid migrations:")
+    # Build the whole report and emit it with one write instead of a print
+    # call (and syscall) per violation
+    lines = [f"Found {len(invalid_edges)} edges with invalid migrations:"]
     for edge_id, violations in invalid_edges.items():
-        print(f"\nEdge ID: {edge_id}")
+        lines.append(f"\nEdge ID: {edge_id}")
         for v in violations:
-            print(f"  Time {v['time_start']:.4f} -> {v['time_end']:.4f}: "
-                  f"Invalid transition from state {v['from_state']} "
-                  f"to state {v['to_state']}")
+            lines.append(f"  Time {v['time_start']:.4f} -> {v['time_end']:.4f}: "
+                         f"Invalid transition from state {v['from_state']} "
+                         f"to state {v['to_state']}")
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 # Example usage
@@ -1,13 +1,20 @@
-import json
+import orjson
 import tskit
-import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 
 
-def convert_metadata_to_dict(metadata_bytes):
-    """Convert metadata bytes to dictionary, handling empty metadata"""
-    if not metadata_bytes:
-        return {}
-    return json.loads(metadata_bytes.decode())
+def decode_metadata_column(table):
+    """Decode a table's packed metadata buffer into one dict per row.
+
+    tskit stores metadata as a single bytes buffer plus an offset array;
+    slicing that directly avoids constructing a row object per entry, and
+    empty metadata decodes to an empty dict.
+    """
+    buf = table.metadata
+    offsets = table.metadata_offset
+    return [orjson.loads(buf[offsets[i]:offsets[i + 1]].tobytes())
+            if offsets[i + 1] > offsets[i] else {}
+            for i in range(len(offsets) - 1)]
 
 
 def safe_float_convert(value, default=None):
@@ -30,103 +37,134 @@ def safe_int_convert(value, default=None):
         return default
 
 
-class NumpyEncoder(json.JSONEncoder):
-    """Custom JSON encoder to handle numpy types"""
+def stream_ndjson(path, rows):
+    """Write an iterable of rows to path as newline-delimited JSON.
+
+    One orjson-encoded row per line, flushed through a ~1 MiB buffer, so
+    peak memory stays bounded regardless of the row count. Unlike a single
+    JSON array, downstream loaders can parse NDJSON line by line without
+    holding the whole document, and there is no indentation overhead.
+    """
+    with open(path, "wb") as f:
+        buf = bytearray()
+        for row in rows:
+            buf.extend(orjson.dumps(row, option=orjson.OPT_SERIALIZE_NUMPY))
+            buf.extend(b"\n")
+            if len(buf) > 1 << 20:
+                f.write(buf)
+                buf.clear()
+        if buf:
+            f.write(buf)
+
 
-    def default(self, obj):
-        if isinstance(obj, np.integer):
-            return int(obj)
-        if isinstance(obj, np.floating):
-            return float(obj)
-        if isinstance(obj, np.ndarray):
-            return obj.tolist()
-        return super().default(obj)
+def _write_table(table_name, rows):
+    """Stream one table to ./data/<table_name>.ndjson and return the path."""
+    output_path = f"./data/{table_name}.ndjson"
+    stream_ndjson(output_path, rows)
+    return output_path
 
 
 def process_tree_sequence(tree_path):
     # Load the tree sequence
     ts = tskit.load(tree_path)
 
-    # Initialize data structures for each table
-    populations_data = []
-    individuals_data = []
-    nodes_data = []
-    edges_data = []
-
-    # Process populations
-    for pop_id in range(ts.num_populations):
-        pop = ts.population(pop_id)
-        metadata = convert_metadata_to_dict(pop.metadata)
-        populations_data.append({
-            "id": pop_id,  # Keeping 0-based indexing
-            "name": metadata.get("name", ""),
-            "region": metadata.get("region", "")
-        })
-
-    # Process individuals and their nodes
-    for ind_id in range(ts.num_individuals):
-        ind = ts.individual(ind_id)
-        metadata = convert_metadata_to_dict(ind.metadata)
-
-        # Convert location to proper format
-        location = None if len(ind.location) == 0 else ind.location
-
-        individuals_data.append({
-            "id": ind_id,  # Keeping 0-based indexing
-            "flags": int(ind.flags),
-            "location": location,
-            "parents": ind.parents,
-            "nodes": ind.nodes,
-            "array_non_reference_discordance": safe_float_convert(metadata.get("array_non_reference_discordance")),
-            "capmq": safe_int_convert(metadata.get("capmq")),
-            "coverage": safe_float_convert(metadata.get("coverage")),
-            "freemix": safe_float_convert(metadata.get("freemix")),
-            "insert_size_average": safe_float_convert(metadata.get("insert_size_average")),
-            "library": metadata.get("library", ""),
-            "library_type": metadata.get("library_type", ""),
-            "region": metadata.get("region", ""),
-            "sample": metadata.get("sample", ""),
-            "sample_accession": metadata.get("sample_accession", ""),
-            "sex": metadata.get("sex", ""),
-            "source": metadata.get("source", "")
-        })
-
-    # Process nodes
-    for node_id in range(ts.num_nodes):
-        node = ts.node(node_id)
-        nodes_data.append({
-            "id": node_id,  # Keeping 0-based indexing
-            "flags": int(node.flags),
-            "time": float(node.time),
-            "population": node.population if node.population != -1 else None,  # Keep 0-based population reference
-            "individual": node.individual if node.individual != -1 else None,  # Keep 0-based individual reference
-            "ancestor_data_id": None  # This field isn't provided in the tree sequence
-        })
-
-    # Process edges
-    for edge_id in range(ts.num_edges):
-        edge = ts.edge(edge_id)
-        edges_data.append({
-            "id": edge_id,  # Keeping 0-based indexing
-            "parent": int(edge.parent),  # Keep 0-based node reference
-            "child": int(edge.child)  # Keep 0-based node reference
-        })
-
-    # Write each table to its own JSON file
+    # Each table is produced by a generator over the tables' SoA columns and
+    # streamed straight to disk, so no table is ever materialized as a full
+    # list of row dicts.
+
+    def populations_rows():
+        for pop_id, metadata in enumerate(
+                decode_metadata_column(ts.tables.populations)):
+            yield {
+                "id": pop_id,  # Keeping 0-based indexing
+                "name": metadata.get("name", ""),
+                "region": metadata.get("region", "")
+            }
+
+    # Individuals need their ragged location/parents columns sliced out via
+    # the offset arrays, and each individual's nodes collected from the node
+    # table's individual column.
+    ind_table = ts.tables.individuals
+    ind_metadata = decode_metadata_column(ind_table)
+    ind_flags = ind_table.flags.tolist()
+    location, location_offset = ind_table.location, ind_table.location_offset
+    parents, parents_offset = ind_table.parents, ind_table.parents_offset
+
+    nodes_of_individual = [[] for _ in range(ts.num_individuals)]
+    for node_id, ind_id in enumerate(ts.tables.nodes.individual.tolist()):
+        if ind_id != -1:
+            nodes_of_individual[ind_id].append(node_id)
+
+    def individuals_rows():
+        for ind_id in range(ts.num_individuals):
+            metadata = ind_metadata[ind_id]
+
+            # Convert location to proper format
+            loc = location[location_offset[ind_id]:location_offset[ind_id + 1]]
+
+            yield {
+                "id": ind_id,  # Keeping 0-based indexing
+                "flags": ind_flags[ind_id],
+                "location": None if len(loc) == 0 else loc,
+                "parents": parents[parents_offset[ind_id]:parents_offset[ind_id + 1]],
+                "nodes": nodes_of_individual[ind_id],
+                "array_non_reference_discordance": safe_float_convert(metadata.get("array_non_reference_discordance")),
+                "capmq": safe_int_convert(metadata.get("capmq")),
+                "coverage": safe_float_convert(metadata.get("coverage")),
+                "freemix": safe_float_convert(metadata.get("freemix")),
+                "insert_size_average": safe_float_convert(metadata.get("insert_size_average")),
+                "library": metadata.get("library", ""),
+                "library_type": metadata.get("library_type", ""),
+                "region": metadata.get("region", ""),
+                "sample": metadata.get("sample", ""),
+                "sample_accession": metadata.get("sample_accession", ""),
+                "sex": metadata.get("sex", ""),
+                "source": metadata.get("source", "")
+            }
+
+    def nodes_rows():
+        # tolist() unboxes whole columns at once instead of constructing a
+        # Node object per row
+        node_table = ts.tables.nodes
+        for node_id, (flags, node_time, population, individual) in enumerate(
+                zip(node_table.flags.tolist(), node_table.time.tolist(),
+                    node_table.population.tolist(),
+                    node_table.individual.tolist())):
+            yield {
+                "id": node_id,  # Keeping 0-based indexing
+                "flags": flags,
+                "time": node_time,
+                "population": population if population != -1 else None,  # Keep 0-based population reference
+                "individual": individual if individual != -1 else None,  # Keep 0-based individual reference
+                "ancestor_data_id": None  # This field isn't provided in the tree sequence
+            }
+
+    def edges_rows():
+        edge_table = ts.tables.edges
+        for edge_id, (parent, child) in enumerate(
+                zip(edge_table.parent.tolist(), edge_table.child.tolist())):
+            yield {
+                "id": edge_id,  # Keeping 0-based indexing
+                "parent": parent,  # Keep 0-based node reference
+                "child": child  # Keep 0-based node reference
+            }
+
+    # Stream each table to its own NDJSON file
     tables = {
-        "populations": populations_data,
-        "individuals": individuals_data,
-        "nodes": nodes_data,
-        "edges": edges_data
+        "populations": populations_rows(),
+        "individuals": individuals_rows(),
+        "nodes": nodes_rows(),
+        "edges": edges_rows()
     }
 
-    for table_name, data in tables.items():
-        output_path = f"./data/{table_name}.json"
-        with open(output_path, "w") as f:
-            json.dump(data, f, cls=NumpyEncoder, indent=2)
-        print(f"Created {output_path}")
+    # Encode and write the four tables in parallel; both orjson.dumps and
+    # the file writes release the GIL, so the work overlaps
+    with ThreadPoolExecutor(max_workers=len(tables)) as executor:
+        for output_path in executor.map(_write_table, tables.keys(),
+                                        tables.values()):
+            print(f"Created {output_path}")
 
 
 if __name__ == "__main__":
     tree_path = "./data/trees/chr18p.trees"
-    process_tree_sequence(tree_path)
\ No newline at end of file
+    process_tree_sequence(tree_path)